@@ -1,48 +1,143 @@
-from flask import Flask, render_template, request, redirect, url_for
+import threading
+import uuid
+from dataclasses import dataclass
+
+from flask import Flask, Response, request, redirect, url_for
+from markupsafe import escape
 
 app = Flask(__name__)
 
-# Global list of tasks with incremental ids
-tasks = []
+
+@dataclass(slots=True)
+class Task:
+    """A single to-do item."""
+
+    id: int
+    text: str
+    completed: bool = False
+
+
+# Global tasks keyed by their incremental id (dicts keep insertion order)
+tasks = {}
 _next_id = 1
+# Guards tasks, _next_id, _version and _cached_index when served by concurrent workers
+_lock = threading.Lock()
+
+# Bumped on every task mutation; together with the per-process boot id it forms
+# the index page's ETag, so a restarted or different worker never matches
+_version = 0
+_boot_id = uuid.uuid4().hex[:8]
+
+# (etag, page) for the rendered index page, rebuilt lazily after any task mutation
+_cached_index = None
+
+# Index page fragments, joined directly instead of going through Jinja
+_HEAD = (
+    '<!doctype html>\n'
+    '<html><head><meta charset="utf-8"><title>Task Manager</title>'
+    '<style>.done{{text-decoration:line-through}}</style></head><body>\n'
+    '<h1>Tasks</h1>\n'
+    '<form method="post" action="{add_url}">'
+    '<input name="text" placeholder="New task" autofocus> <button>Add</button>'
+    '</form>\n'
+    '<ul>\n'
+)
+_TAIL = '</ul>\n</body></html>\n'
+_ROW = (
+    '<li{cls}>{text} '
+    '<form method="post" action="{complete_url}" style="display:inline">'
+    '<button>done</button></form></li>\n'
+)
 
 
 def add_task(text):
     """Add a task with the given text. Returns the new task's id."""
-    global _next_id
-    task_id = _next_id
-    _next_id += 1
-    tasks.append({"id": task_id, "text": text, "completed": False})
+    global _next_id, _version, _cached_index
+    with _lock:
+        task_id = _next_id
+        _next_id += 1
+        tasks[task_id] = Task(task_id, text)
+        _cached_index = None
+        _version += 1
     return task_id
 
 
 def complete_task(id):
     """Mark the task with the given id as completed. Returns True if found, False otherwise."""
-    for task in tasks:
-        if task["id"] == id:
-            task["completed"] = True
+    global _version, _cached_index
+    with _lock:
+        task = tasks.get(id)
+        if task is None:
+            return False
+        if task.completed:
             return True
-    return False
+        task.completed = True
+        _cached_index = None
+        _version += 1
+    return True
+
+
+def _render_row(task):
+    """Render a single task as an HTML list item."""
+    return _ROW.format(
+        cls=' class="done"' if task.completed else '',
+        text=escape(task.text),
+        complete_url=url_for('complete', task_id=task.id),
+    )
+
+
+def _is_xhr():
+    """Return True if the current request was sent by JavaScript (htmx or XHR)."""
+    return (
+        'HX-Request' in request.headers
+        or request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+    )
 
 
 @app.route('/')
 def index():
-    return render_template('index.html', tasks=tasks)
+    global _cached_index
+    # The ETag and page are cached as one pair under the lock, so they always match
+    cached = _cached_index
+    if cached is None:
+        with _lock:
+            if _cached_index is None:
+                head = _HEAD.format(add_url=url_for('add'))
+                page = head + ''.join(_render_row(t) for t in tasks.values()) + _TAIL
+                _cached_index = (f'{_boot_id}-{_version}', page)
+            cached = _cached_index
+    etag, page = cached
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(page, mimetype='text/html')
+    resp.set_etag(etag, weak=True)
+    resp.cache_control.no_cache = True
+    return resp
 
 
 @app.route('/add', methods=['POST'])
 def add():
     text = request.form.get('text', '').strip()
-    if text:
-        add_task(text)
+    task_id = add_task(text) if text else None
+    if _is_xhr():
+        if task_id is None:
+            return '', 204
+        return Response(_render_row(tasks[task_id]), mimetype='text/html')
     return redirect(url_for('index'))
 
 
 @app.route('/complete/<int:task_id>', methods=['POST'])
 def complete(task_id):
-    complete_task(task_id)
+    found = complete_task(task_id)
+    if _is_xhr():
+        return '', 204 if found else 404
     return redirect(url_for('index'))
 
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    # Tasks live in process memory, so run a single worker under gunicorn:
+    # gunicorn -k gevent -w 1 app:app
+    from gevent.pywsgi import WSGIServer
+
+    WSGIServer(('127.0.0.1', 5000), app).serve_forever()
@@ -0,0 +1,76 @@
+import pytest
+
+import app as task_app
+
+XHR = {'HX-Request': 'true'}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(task_app, 'tasks', {})
+    monkeypatch.setattr(task_app, '_next_id', 1)
+    monkeypatch.setattr(task_app, '_version', 0)
+    monkeypatch.setattr(task_app, '_cached_index', None)
+    return task_app.app.test_client()
+
+
+def test_index_etag_round_trip(client):
+    first = client.get('/')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    again = client.get('/', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+    assert again.headers['Cache-Control'] == 'no-cache'
+
+
+def test_etag_changes_after_add_and_complete(client):
+    etag0 = client.get('/').headers['ETag']
+    client.post('/add', data={'text': 'write tests'})
+
+    after_add = client.get('/', headers={'If-None-Match': etag0})
+    assert after_add.status_code == 200
+    assert b'write tests' in after_add.data
+    etag1 = after_add.headers['ETag']
+    assert etag1 != etag0
+
+    client.post('/complete/1')
+    after_complete = client.get('/', headers={'If-None-Match': etag1})
+    assert after_complete.status_code == 200
+    assert b'class="done"' in after_complete.data
+    etag2 = after_complete.headers['ETag']
+    assert etag2 != etag1
+
+    # Completing an already completed task leaves the page and ETag alone
+    client.post('/complete/1')
+    assert client.get('/', headers={'If-None-Match': etag2}).status_code == 304
+
+
+def test_xhr_add_returns_row_fragment(client):
+    resp = client.post('/add', data={'text': 'buy milk'}, headers=XHR)
+    assert resp.status_code == 200
+    assert resp.data.startswith(b'<li>buy milk ')
+    assert b'action="/complete/1"' in resp.data
+
+    assert client.post('/add', data={'text': '  '}, headers=XHR).status_code == 204
+
+
+def test_xhr_complete_status(client):
+    client.post('/add', data={'text': 'buy milk'})
+    assert client.post('/complete/1', headers=XHR).status_code == 204
+    assert client.post('/complete/1', headers=XHR).status_code == 204
+    assert client.post('/complete/99', headers=XHR).status_code == 404
+
+
+def test_non_xhr_mutations_redirect(client):
+    assert client.post('/add', data={'text': 'buy milk'}).status_code == 302
+    assert client.post('/complete/1').status_code == 302
+
+
+def test_task_text_is_escaped(client):
+    client.post('/add', data={'text': '<b>bold</b>'})
+    page = client.get('/').data
+    assert b'<b>' not in page
+    assert b'&lt;b&gt;bold&lt;/b&gt;' in page